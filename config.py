@@ -26,8 +26,9 @@ GESTURE_HOLD_TIME = 0.25
 STATE_TRANSITION_DELAY = 0.15
 
 # === ANTI-JITTER & DEPTH ===
-LANDMARK_BUFFER_SIZE = 7
-POSITION_SMOOTHING_FACTOR = 0.3
+ONE_EURO_MIN_CUTOFF = 1.0   # Hz; cutoff while the hand is still (lower = smoother)
+ONE_EURO_BETA = 5.0         # Cutoff increase per unit of speed (higher = less lag on fast moves)
+ONE_EURO_D_CUTOFF = 1.0     # Hz; cutoff for the speed estimate itself
 JITTER_THRESHOLD_PX = 2
 MIN_MOVEMENT_THRESHOLD = 0.005
 
@@ -38,8 +39,8 @@ DEPTH_SCALE_FACTOR = 1.5
 
 # === CAMERA SETTINGS ===
 CAMERA_INDEX = 0
-CAMERA_WIDTH = 540
-CAMERA_HEIGHT = 380
+CAMERA_WIDTH = 640   # 640x360 is a native MJPG mode on most webcams and matches the
+CAMERA_HEIGHT = 360  # inference size, so frames go to MediaPipe without a resize
 CAMERA_FPS = 60
 
 # === MEDIAPIPE SETTINGS ===
@@ -47,6 +48,13 @@ MP_MIN_DETECTION_CONFIDENCE = 0.7
 MP_MIN_TRACKING_CONFIDENCE = 0.7
 MP_MODEL_COMPLEXITY = 1
 MP_MAX_HANDS = 1
+# "solutions": synchronous mp.solutions.hands with ROI tracking (default)
+# "tasks": asynchronous Tasks HandLandmarker (LIVE_STREAM) using the bundled model below
+MP_BACKEND = "solutions"
+MP_TASK_MODEL_PATH = "hand_landmarker.task"
+
+# === GPU (OpenCL) ===
+USE_OPENCL = False  # Resize/convert on the iGPU via cv2.UMat; only used if OpenCL is available
 
 # === VISUAL FEEDBACK ===
 SHOW_SKELETON = True
@@ -1,105 +1,611 @@
 import cv2
+import logging
+import math
+from itertools import chain
+from operator import attrgetter
 import numpy as np
+import sys
+import threading
 import time
 import config
 import mediapipe as mp
-from collections import deque
+from gesture_kernels import (classify_pose, one_euro_update, warmup, NUMBA_AVAILABLE,
+                             POSE_FIST, POSE_PINCH, POSE_V_SIGN)
+
+log = logging.getLogger('gesture.engine')
+
+# Gesture names returned by process_frame. Interned, so consumers can compare with `is`
+GESTURE_NONE = sys.intern("none")
+GESTURE_FIST = sys.intern("fist")
+GESTURE_SWIPE_RIGHT = sys.intern("swipe_right")
+GESTURE_SWIPE_LEFT = sys.intern("swipe_left")
+GESTURE_PINCH_OPEN = sys.intern("pinch_open")
+GESTURE_PINCH_CLOSE = sys.intern("pinch_close")
+GESTURE_LABELS = {g: f"COMMAND: {g.upper()}" for g in (
+    GESTURE_FIST, GESTURE_SWIPE_RIGHT, GESTURE_SWIPE_LEFT, GESTURE_PINCH_OPEN, GESTURE_PINCH_CLOSE)}
+
+FINGERTIPS = [4, 8, 12, 16, 20]
+JOINTS = [i for i in range(21) if i not in FINGERTIPS]
+DOT_ORDER = np.array(JOINTS + FINGERTIPS, dtype=np.intp)  # Joints first, then tips (drawn on top)
+OVERLAY_LANDMARKS = np.array([0, 8, 12], dtype=np.intp)  # Wrist, index tip, middle tip: mode overlay anchors
+HAND_CONNECTIONS = np.asarray(sorted(mp.solutions.hands.HAND_CONNECTIONS), dtype=np.int32)  # (E, 2)
+INFERENCE_SIZE = (640, 360)  # (w, h) fed to MediaPipe; landmarks are normalized so drawing is unaffected
+ROI_PADDING = 0.2            # Fraction of the hand bbox added on each side of the tracking crop
+ROI_MIN_SIZE = 48            # Crops smaller than this (px) fall back to full-frame detection
+ROI_MAX_MISSES = 2           # Consecutive empty crops before palm detection runs again
+ROI_UPDATE_PX = 8            # Crop is only moved/resized when an edge would shift by more than this
+SWIPE_NEXT_DX = 0.12         # Rightward index-tip travel over the buffer that triggers NEXT
+SWIPE_PREV_DX = 0.10         # Leftward travel for PREVIOUS (lowered from 0.18 for instant response)
+SWIPE_COOLDOWN = 0.6         # Seconds between swipes
+JITTER_WINDOW = 15           # Frames of cursor position used for the jitter metric
+QUALITY_WINDOW = 30          # Samples in the rolling medians (frame interval, full-frame inference time)
+SLOW_INFERENCE_S = 0.020     # Median full-frame detect time above this -> switch to the lite model
+FAST_INFERENCE_S = 0.010     # Median lite detect time below this -> back to MP_MODEL_COMPLEXITY (the
+                             # full model is roughly 2x slower, so this stays clear of SLOW_INFERENCE_S)
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+HUD_SIZE = (90, 180)         # (h, w) of the metrics panel in the bottom-left corner
+MOTION_SIZE = (80, 60)       # (w, h) grayscale thumbnail used to detect a static scene
+MOTION_THRESHOLD = 0.8       # Mean abs pixel change (0-255) inside the hand box below which detection
+                             # is skipped; ~0.3-0.5 for a still hand with sensor noise, >1 for a 5 px move
+MOTION_MAX_SKIPS = 3         # Consecutive skipped detections before one is forced anyway
+DEPTH_WINDOW = 5             # Frames averaged for the depth estimate
+DEPTH_CALIBRATION = 8.0      # Wrist->middle-MCP span (normalized) x distance (cm) for an average hand
+
+_XYZ = attrgetter("x", "y", "z")
+
+
+def landmarks_to_array(landmarks):
+    """Flatten 21 MediaPipe landmarks (anything with .x/.y/.z) into a contiguous float32 (21, 3) array"""
+    # attrgetter + chain keeps the per-landmark work in C (no generator frame per value)
+    return np.fromiter(chain.from_iterable(map(_XYZ, landmarks)),
+                       dtype=np.float32, count=63).reshape(21, 3)
+
+
+class LiveStreamLandmarker:
+    """MediaPipe Tasks HandLandmarker in LIVE_STREAM mode (config.MP_BACKEND = "tasks").
+
+    detect() hands the frame to MediaPipe's own pipeline and returns at once with
+    the newest finished result, so inference overlaps capture and drawing. The
+    landmarks trail the submitted frame by roughly one inference time.
+    """
+
+    def __init__(self, model_path, num_hands):
+        from mediapipe.tasks.python import BaseOptions, vision
+        self._lock = threading.Lock()
+        self._latest = None
+        self._last_ts = -1
+        options = vision.HandLandmarkerOptions(
+            base_options=BaseOptions(model_asset_path=model_path),
+            running_mode=vision.RunningMode.LIVE_STREAM,
+            num_hands=num_hands,
+            min_hand_detection_confidence=0.8,
+            min_hand_presence_confidence=0.8,
+            min_tracking_confidence=0.8,
+            result_callback=self._on_result)
+        self._landmarker = vision.HandLandmarker.create_from_options(options)
+
+    def _on_result(self, result, image, timestamp_ms):
+        # Called on MediaPipe's thread
+        lm = landmarks_to_array(result.hand_landmarks[0]) if result.hand_landmarks else None
+        with self._lock:
+            self._latest = lm
+
+    def detect(self, rgb, timestamp_ms):
+        """Submit an RGB frame; returns a copy of the newest (21, 3) result or None"""
+        if timestamp_ms > self._last_ts:  # LIVE_STREAM requires strictly increasing timestamps
+            self._last_ts = timestamp_ms
+            self._landmarker.detect_async(mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb), timestamp_ms)
+        with self._lock:
+            lm = self._latest
+        return None if lm is None else lm.copy()  # The caller mirrors it in place
+
+    def close(self):
+        self._landmarker.close()
+
+
+class RingBuffer:
+    """Fixed-capacity float32 ring buffer (drop-in for a numeric deque(maxlen=N))"""
+
+    def __init__(self, size):
+        self._buf = np.zeros(size, dtype=np.float32)
+        self._head = 0
+        self._fill = 0
+
+    def __len__(self):
+        return self._fill
+
+    @property
+    def full(self):
+        return self._fill == len(self._buf)
+
+    def append(self, value):
+        self._buf[self._head] = value
+        self._head = (self._head + 1) % len(self._buf)
+        self._fill = min(self._fill + 1, len(self._buf))
+
+    def clear(self):
+        self._head = 0
+        self._fill = 0
+
+    def mean(self):
+        return float(self._buf[:self._fill].mean())
+
+    def median(self):
+        return float(np.median(self._buf[:self._fill]))
+
+    def span(self):
+        """Newest minus oldest sample"""
+        oldest = self._head if self.full else 0
+        return float(self._buf[self._head - 1] - self._buf[oldest])
+
+
+class OneEuroFilter:
+    """One Euro filter (Casiez et al. 2012) applied elementwise to a float32 (N, 3) array.
+
+    An EMA whose cutoff rises with the (smoothed) speed of each element: heavy
+    smoothing while the hand is still, little lag while it moves fast.
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=0.0, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self._twopi = np.float32(2.0 * math.pi)
+        self.x_prev = None
+        self.dx_prev = None
+        self.reset()
+
+    def reset(self):
+        # State buffers are kept; the next sample re-seeds them
+        self._primed = False
+        self.t_prev = None
+
+    def __call__(self, x, t):
+        """Filter array `x` sampled at time `t` (seconds); returns the filtered array"""
+        if not self._primed:
+            if self.x_prev is None or self.x_prev.shape != x.shape:
+                # Position and speed state as one float32 block, allocated once
+                self._state = np.empty((2, *x.shape), dtype=np.float32)
+                self.x_prev, self.dx_prev = self._state
+            np.copyto(self.x_prev, x)
+            self.dx_prev.fill(0.0)
+            self.t_prev = t
+            self._primed = True
+            return self.x_prev
+        dt = t - self.t_prev
+        if dt <= 0:
+            return self.x_prev
+        self.t_prev = t
+
+        if NUMBA_AVAILABLE:
+            # Fused native loop, no temporaries
+            one_euro_update(x, self.x_prev, self.dx_prev, dt, self.min_cutoff, self.beta, self.d_cutoff)
+            return self.x_prev
+
+        # Low-pass smoothing factor for cutoff fc: 1 / (1 + 1 / (2*pi*fc*dt)).
+        # Scalars are float32 too, so nothing is upcast to float64
+        dt = np.float32(dt)
+        twopi_dt = self._twopi * dt
+        dx = (x - self.x_prev) / dt
+        self.dx_prev += (dx - self.dx_prev) / (1.0 + 1.0 / (twopi_dt * np.float32(self.d_cutoff)))
+        cutoff = np.float32(self.min_cutoff) + np.float32(self.beta) * np.abs(self.dx_prev)
+        self.x_prev += (x - self.x_prev) / (1.0 + 1.0 / (twopi_dt * cutoff))
+        return self.x_prev
+
 
 class GestureEngine:
     def __init__(self):
         self.mp_hands = mp.solutions.hands
-        self.mp_drawing = mp.solutions.drawing_utils
-        self.hands = self.mp_hands.Hands(model_complexity=0, min_detection_confidence=0.8, min_tracking_confidence=0.8)
+        if config.MP_BACKEND == "tasks":
+            # Asynchronous Tasks landmarker; it does its own tracking, so no ROI/lite models
+            self.landmarker = LiveStreamLandmarker(config.MP_TASK_MODEL_PATH, config.MP_MAX_HANDS)
+            self.hands = self.hands_roi = None
+        else:
+            self.landmarker = None
+            # Full-frame detector for acquiring the hand, light model for tracking it inside a crop
+            self.hands = self.mp_hands.Hands(max_num_hands=config.MP_MAX_HANDS, model_complexity=config.MP_MODEL_COMPLEXITY, min_detection_confidence=0.8, min_tracking_confidence=0.8)
+            self.hands_roi = self.mp_hands.Hands(max_num_hands=config.MP_MAX_HANDS, model_complexity=0, min_detection_confidence=0.8, min_tracking_confidence=0.8)
+        self._roi = None  # (x0, y0, x1, y1) in inference-frame pixels
+        self._roi_misses = 0
+
+        # Adaptive quality: complexity-0 full-frame detector, created on first slowdown
+        self.hands_lite = None
+        self._use_lite = False
+        self.frame_times = RingBuffer(QUALITY_WINDOW)       # Camera frame intervals (FPS display)
+        self.inference_times = RingBuffer(QUALITY_WINDOW)  # Full-frame detector.process() durations
+        self._last_frame_t = None
+        self.fps = 0.0
         
+        # Reused inference buffers (no per-frame resize/convert allocations)
+        iw, ih = INFERENCE_SIZE
+        self._resize_buf = np.empty((ih, iw, 3), dtype=np.uint8)
+        self._rgb_small = np.empty((ih, iw, 3), dtype=np.uint8)
+        self._crop_buf = np.empty(ih * iw * 3, dtype=np.uint8)  # Backing store for ROI crops
+        self._display_buf = None  # Mirrored output frame, sized on first use
+
+        # Static-scene gating: thumbnail of the current frame vs. the last detected one
+        mw, mh = MOTION_SIZE
+        self._motion_rgb = np.empty((mh, mw, 3), dtype=np.uint8)
+        self._motion_cur = np.empty((mh, mw), dtype=np.uint8)
+        self._motion_ref = np.empty((mh, mw), dtype=np.uint8)
+        self._motion_ref_valid = False
+        self._motion_skips = 0
+        self._motion_box = (slice(None), slice(None))  # Thumbnail region that is compared
+        self._last_lm = None
+        self._use_ocl = config.USE_OPENCL and cv2.ocl.haveOpenCL()
+        cv2.ocl.setUseOpenCL(self._use_ocl)
+
         # Smoothing Buffers
-        self.y_buffer = deque(maxlen=5)
-        self.x_buffer = deque(maxlen=5)
+        self.y_buffer = RingBuffer(5)
+        self.x_buffer = RingBuffer(5)
+
+        # Adaptive low-pass over all 21 landmarks at once
+        self.lm_filter = OneEuroFilter(config.ONE_EURO_MIN_CUTOFF, config.ONE_EURO_BETA, config.ONE_EURO_D_CUTOFF)
         
+        # Sliding-window Welford state for the jitter metric (px)
+        self._jit_buf = [(0.0, 0.0)] * JITTER_WINDOW
+        self._jit_head = 0
+        self._jit_n = 0
+        self._jit_mean_x = 0.0
+        self._jit_mean_y = 0.0
+        self._jit_M2 = 0.0  # Summed over x and y
+        self.jitter = 0.0
+
+        # Running-sum ring for the depth estimate (cm)
+        self._depth_buf = [0.0] * DEPTH_WINDOW
+        self._depth_head = 0
+        self._depth_fill = 0
+        self._depth_sum = 0.0
+        self.depth_cm = 0.0
+
         # State tracking
         self.last_action_time = 0
         self.fist_start_time = None
         self.volume_anchor_y = None 
         self.active_mode = "none" # 'volume', 'slide', or 'none'
 
-    def is_v_sign(self, landmarks):
-        """Sharpened detection: Index and Middle clearly extended, others curled"""
-        index_up = landmarks.landmark[8].y < landmarks.landmark[6].y
-        middle_up = landmarks.landmark[12].y < landmarks.landmark[10].y
-        ring_down = landmarks.landmark[16].y > landmarks.landmark[14].y
-        pinky_down = landmarks.landmark[20].y > landmarks.landmark[18].y
-        
-        # V-Shape check: Index and Middle should have horizontal distance
-        v_gap = abs(landmarks.landmark[8].x - landmarks.landmark[12].x)
-        
-        return index_up and middle_up and ring_down and pinky_down and v_gap > 0.02
+        self._snapshot_config()
 
-    def process_frame(self, frame):
+        # Metrics HUD: labels rendered once, values re-rendered only when they change
+        self._hud_labels = np.zeros((*HUD_SIZE, 3), dtype=np.uint8)
+        for row, label in enumerate(("FPS:", "Jitter:", "Depth:")):
+            cv2.putText(self._hud_labels, label, (10, 20 + 25 * row),
+                        FONT, 0.6, self._color_text, 2)
+        self._hud = self._hud_labels.copy()
+        self._hud_values = None
+        self._hud_frame_h = None  # Frame height the cached HUD rows were computed for
+        self._hud_rows = None
+
+        # Pay the pose-kernel JIT cost now rather than on the first detected hand
+        warmup()
+
+    def _snapshot_config(self):
+        """Copy the config values read every frame into attributes (skips module lookups on the hot path)"""
+        self._show_skeleton = config.SHOW_SKELETON
+        self._show_gesture_name = config.SHOW_GESTURE_NAME
+        self._show_metrics = config.SHOW_METRICS
+        self._color_skeleton = config.COLOR_SKELETON
+        self._color_joints = config.COLOR_JOINTS
+        self._color_fingertips = config.COLOR_FINGERTIPS
+        self._dot_colors = [self._color_joints] * len(JOINTS) + [self._color_fingertips] * len(FINGERTIPS)
+        self._color_text = config.COLOR_TEXT
+
+    def detect_landmarks(self, current_time):
+        """Landmarks for the inference frame as a (21, 3) array or None.
+
+        If the scene hasn't changed since the last detection, that result is
+        reused instead of running MediaPipe again (at most MOTION_MAX_SKIPS times).
+        """
+        cv2.resize(self._rgb_small, MOTION_SIZE, dst=self._motion_rgb, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._motion_rgb, cv2.COLOR_RGB2GRAY, dst=self._motion_cur)
+        if self._motion_skips < MOTION_MAX_SKIPS and self._motion_ref_valid:
+            # Scored only around the hand: over the whole frame a moving hand is
+            # averaged away against the static background
+            cur = self._motion_cur[self._motion_box]
+            change = cv2.norm(cur, self._motion_ref[self._motion_box], cv2.NORM_L1) / cur.size
+            if change < MOTION_THRESHOLD:
+                self._motion_skips += 1
+                return None if self._last_lm is None else self._last_lm.copy()
+
+        # Compare later frames against the last *detected* one, so slow drift still adds up
+        self._motion_cur, self._motion_ref = self._motion_ref, self._motion_cur
+        self._motion_ref_valid = True
+        self._motion_skips = 0
+        self._last_lm = self._run_detector(current_time)
+        self._motion_box = self._thumbnail_box(self._last_lm)
+        return None if self._last_lm is None else self._last_lm.copy()
+
+    def _thumbnail_box(self, lm):
+        """Thumbnail slices covering the padded hand box (the whole thumbnail without a hand)"""
+        roi = None if lm is None else self._roi_around(lm)
+        if roi is None:
+            return slice(None), slice(None)
+        iw, ih = INFERENCE_SIZE
+        mw, mh = MOTION_SIZE
+        x0, y0, x1, y1 = roi
+        return slice(y0 * mh // ih, -(-y1 * mh // ih)), slice(x0 * mw // iw, -(-x1 * mw // iw))
+
+    def _run_detector(self, current_time):
+        """Run MediaPipe on the inference frame; returns a (21, 3) array or None.
+
+        Once a hand is found, later frames only process a padded crop around
+        the previous landmarks, so the palm detector runs only to re-acquire.
+        """
+        if self.landmarker is not None:
+            return self.landmarker.detect(self._rgb_small, int(current_time * 1000))
+
+        if self._roi is not None:
+            x0, y0, x1, y1 = self._roi
+            # Contiguous copy of the crop into the front of a reused flat buffer
+            crop = self._crop_buf[:(y1 - y0) * (x1 - x0) * 3].reshape(y1 - y0, x1 - x0, 3)
+            np.copyto(crop, self._rgb_small[y0:y1, x0:x1])
+            results = self.hands_roi.process(crop)
+            if not results.multi_hand_landmarks:
+                self._roi_misses += 1
+                if self._roi_misses >= ROI_MAX_MISSES:
+                    self._roi = None
+                return None
+            self._roi_misses = 0
+
+            # Crop-normalized -> frame-normalized (affine cached per crop)
+            lm = landmarks_to_array(results.multi_hand_landmarks[0].landmark)
+            lm *= self._roi_scale
+            lm += self._roi_offset
+        else:
+            detector = self.hands_lite if self._use_lite else self.hands
+            t0 = time.perf_counter()
+            results = detector.process(self._rgb_small)
+            self.update_model_choice(time.perf_counter() - t0)
+            if not results.multi_hand_landmarks:
+                return None
+            lm = landmarks_to_array(results.multi_hand_landmarks[0].landmark)
+
+        self._set_roi(self._roi_around(lm))
+        self._roi_misses = 0
+        return lm
+
+    def _set_roi(self, roi):
+        """Adopt a new tracking crop, unless it's within ROI_UPDATE_PX of the current one"""
+        if roi is not None and self._roi is not None and \
+                max(abs(a - b) for a, b in zip(roi, self._roi)) <= ROI_UPDATE_PX:
+            return
+        self._roi = roi
+        if roi is not None:
+            iw, ih = INFERENCE_SIZE
+            x0, y0, x1, y1 = roi
+            # lm * scale + offset maps crop-normalized (x, y, z) to the full inference frame
+            self._roi_scale = np.array([(x1 - x0) / iw, (y1 - y0) / ih, (x1 - x0) / iw], dtype=np.float32)
+            self._roi_offset = np.array([x0 / iw, y0 / ih, 0.0], dtype=np.float32)
+
+    def update_quality(self, now):
+        """Track camera frame intervals for the FPS readout"""
+        if self._last_frame_t is not None:
+            self.frame_times.append(now - self._last_frame_t)
+        self._last_frame_t = now
+        if self.frame_times.full:
+            median = self.frame_times.median()
+            self.fps = 1.0 / median if median > 0 else 0.0
+
+    def update_model_choice(self, elapsed):
+        """Record one full-frame detect time and swap to/from the lite model when the median drifts.
+
+        Frame intervals can't be used for this: they never drop below the camera's
+        frame period, however fast inference is.
+        """
+        self.inference_times.append(elapsed)
+        if not self.inference_times.full or config.MP_MODEL_COMPLEXITY == 0:
+            return
+
+        median = self.inference_times.median()
+        if not self._use_lite and median > SLOW_INFERENCE_S:
+            if self.hands_lite is None:
+                self.hands_lite = self.mp_hands.Hands(max_num_hands=config.MP_MAX_HANDS, model_complexity=0, min_detection_confidence=0.8, min_tracking_confidence=0.8)
+            self._use_lite = True
+        elif self._use_lite and median < FAST_INFERENCE_S:
+            self._use_lite = False
+        else:
+            return
+
+        # Refill the window (with the new model's timings) before deciding again
+        self.inference_times.clear()
+        log.debug("⚙️ Detection model: %s (median detect %.1f ms)", 'lite' if self._use_lite else 'full', median * 1000)
+
+    def detect_swipe(self, current_time):
+        """Flick of the V-sign index tip over the last 5 frames -> 'swipe_right' / 'swipe_left' / 'none'"""
+        if not self.x_buffer.full or current_time - self.last_action_time <= SWIPE_COOLDOWN:
+            return GESTURE_NONE
+        diff_x = self.x_buffer.span()
+
+        # Most frames sit inside the dead band: one chained compare and out
+        if -SWIPE_PREV_DX <= diff_x <= SWIPE_NEXT_DX:
+            return GESTURE_NONE
+
+        self.last_action_time = current_time
+        self.x_buffer.clear()
+        return GESTURE_SWIPE_RIGHT if diff_x > 0 else GESTURE_SWIPE_LEFT
+
+    def _roi_around(self, lm):
+        iw, ih = INFERENCE_SIZE
+        x_min, y_min = lm[:, :2].min(axis=0)
+        x_max, y_max = lm[:, :2].max(axis=0)
+        pad_x = (x_max - x_min) * ROI_PADDING
+        pad_y = (y_max - y_min) * ROI_PADDING
+        x0 = max(0, int((x_min - pad_x) * iw))
+        y0 = max(0, int((y_min - pad_y) * ih))
+        x1 = min(iw, int((x_max + pad_x) * iw))
+        y1 = min(ih, int((y_max + pad_y) * ih))
+        if x1 - x0 < ROI_MIN_SIZE or y1 - y0 < ROI_MIN_SIZE:
+            return None
+        return x0, y0, x1, y1
+
+    def smooth_landmarks(self, lm, current_time):
+        """One Euro filtered landmarks, returned as a (21, 3) array"""
+        return self.lm_filter(lm, current_time)
+
+    def draw_skeleton(self, frame, lm):
         h, w = frame.shape[:2]
-        current_time = time.time()
+        pts = (lm[:, :2] * (w, h)).astype(np.int32)
+
+        # All bones in one call: each connection is a 2-point open polyline
+        segs = pts[HAND_CONNECTIONS]  # (E, 2, 2)
+        cv2.polylines(frame, segs, False, self._color_skeleton, 2)
+
+        # Dots stay cv2.circle: a 1-point thick polyline would batch them but renders squarish
+        circle = cv2.circle
+        for (x, y), color in zip(pts[DOT_ORDER].tolist(), self._dot_colors):
+            circle(frame, (x, y), 4, color, -1)
+
+    def calculate_jitter(self, x, y):
+        """Positional std-dev (px) over the last JITTER_WINDOW frames, updated in O(1)"""
+        mx, my = self._jit_mean_x, self._jit_mean_y
+        if self._jit_n < JITTER_WINDOW:
+            self._jit_n += 1
+            nx = mx + (x - mx) / self._jit_n
+            ny = my + (y - my) / self._jit_n
+            self._jit_M2 += (x - mx) * (x - nx) + (y - my) * (y - ny)
+        else:
+            # Window full: swap the oldest sample out and the new one in
+            ox, oy = self._jit_buf[self._jit_head]
+            nx = mx + (x - ox) / JITTER_WINDOW
+            ny = my + (y - oy) / JITTER_WINDOW
+            self._jit_M2 += (x - ox) * (x - nx + ox - mx) + (y - oy) * (y - ny + oy - my)
+        self._jit_mean_x, self._jit_mean_y = nx, ny
+        self._jit_buf[self._jit_head] = (x, y)
+        self._jit_head = (self._jit_head + 1) % JITTER_WINDOW
+
+        self.jitter = math.sqrt(max(0.0, self._jit_M2) / self._jit_n)
+        return self.jitter
+
+    def estimate_hand_depth(self, span):
+        """Hand distance (cm) from the 2D wrist->middle-MCP span, averaged over DEPTH_WINDOW frames"""
+        depth = DEPTH_CALIBRATION / span if span > 0 else config.MAX_DEPTH_CM
+        depth = min(max(depth, config.MIN_DEPTH_CM), config.MAX_DEPTH_CM)
+
+        if self._depth_fill == DEPTH_WINDOW:
+            self._depth_sum -= self._depth_buf[self._depth_head]
+        else:
+            self._depth_fill += 1
+        self._depth_buf[self._depth_head] = depth
+        self._depth_sum += depth
+        self._depth_head = (self._depth_head + 1) % DEPTH_WINDOW
+
+        self.depth_cm = self._depth_sum / self._depth_fill
+        return self.depth_cm
+
+    def draw_metrics(self, frame):
+        # Rounded to what is displayed, so the panel is only re-rendered when the text would change
+        values = (round(self.fps), round(self.jitter, 1), round(self.depth_cm))
+        if values != self._hud_values:
+            self._hud_values = values
+            np.copyto(self._hud, self._hud_labels)
+            for row, text in enumerate((f"{values[0]}", f"{values[1]:.1f}px", f"{values[2]}cm")):
+                cv2.putText(self._hud, text, (85, 20 + 25 * row),
+                            FONT, 0.6, self._color_text, 2)
+
+        # Saturating add: black panel pixels leave the frame untouched, text pixels go bright
+        h = frame.shape[0]
+        if h != self._hud_frame_h:
+            self._hud_frame_h = h
+            self._hud_rows = slice(h - HUD_SIZE[0], h)
+        roi = frame[self._hud_rows, :HUD_SIZE[1]]
+        cv2.add(roi, self._hud, dst=roi)
+
+    def reset_smoothing(self):
+        self.lm_filter.reset()
+        self._jit_head = 0
+        self._jit_n = 0
+        self._jit_mean_x = 0.0
+        self._jit_mean_y = 0.0
+        self._jit_M2 = 0.0
+        self._depth_head = 0
+        self._depth_fill = 0
+        self._depth_sum = 0.0
+
+    def process_frame(self, frame, out=None, current_time=None, draw=True):
+        """Detect gestures in a camera frame captured at `current_time` (time.monotonic()).
+
+        Returns (mirrored frame with overlays, gesture, gesture_data). The mirrored
+        frame is written into `out` when it matches, otherwise into an internal buffer.
+        With draw=False nothing is mirrored or drawn and the input frame is returned.
+        """
+        h, w = frame.shape[:2]
+        if current_time is None:
+            current_time = time.monotonic()
+        self.update_quality(current_time)
         
-        # Performance processing
-        small_frame = cv2.resize(frame, (640, 360))
-        results = self.hands.process(cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB))
+        # Performance processing (inference runs on the un-mirrored camera frame)
+        if self._use_ocl:
+            # One upload; resize + convert run as OpenCL kernels and only the small RGB image comes back
+            small = cv2.cvtColor(cv2.resize(cv2.UMat(frame), INFERENCE_SIZE), cv2.COLOR_BGR2RGB)
+            self._rgb_small[...] = small.get()
+        elif (w, h) == INFERENCE_SIZE:
+            # Capture already at inference size: the colour conversion is the only pass
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self._rgb_small)
+        else:
+            cv2.resize(frame, INFERENCE_SIZE, dst=self._resize_buf)
+            cv2.cvtColor(self._resize_buf, cv2.COLOR_BGR2RGB, dst=self._rgb_small)
+        lm = self.detect_landmarks(current_time)
+        if lm is not None:
+            lm[:, 0] = 1.0 - lm[:, 0]  # Mirror for natural interaction
+
+        # Only the displayed image needs the pixel flip
+        if draw:
+            if out is None or out.shape != frame.shape:
+                if self._display_buf is None or self._display_buf.shape != frame.shape:
+                    self._display_buf = np.empty_like(frame)
+                out = self._display_buf
+            frame = cv2.flip(frame, 1, dst=out)
         
-        gesture = "none"
+        gesture = GESTURE_NONE
         gesture_data = {}
         
-        if results.multi_hand_landmarks:
-            landmarks = results.multi_hand_landmarks[0]
-            if config.SHOW_SKELETON:
-                self.mp_drawing.draw_landmarks(frame, landmarks, self.mp_hands.HAND_CONNECTIONS)
+        if lm is not None:
+            smooth = self.smooth_landmarks(lm, current_time)
+            self.calculate_jitter(float(smooth[8, 0]) * w, float(smooth[8, 1]) * h)
+            if draw:
+                if self._show_skeleton:
+                    self.draw_skeleton(frame, lm)
+                # Overlay anchors projected to pixels in one NumPy op
+                wrist, index_tip, middle_tip = map(
+                    tuple, (smooth[OVERLAY_LANDMARKS, :2] * (w, h)).astype(np.int32).tolist())
 
             # --- MODE SELECTION & LOCKING ---
-            dist_pinch = np.sqrt((landmarks.landmark[4].x - landmarks.landmark[8].x)**2 + 
-                                 (landmarks.landmark[4].y - landmarks.landmark[8].y)**2)
-            is_v = self.is_v_sign(landmarks)
-            is_pinch = dist_pinch < 0.06 and not is_v
+            pose, pinch_d2, depth_proxy = classify_pose(lm)
+            self.estimate_hand_depth(float(depth_proxy))
+            is_v = bool(pose & POSE_V_SIGN)
+            is_pinch = bool(pose & POSE_PINCH)
             
             # --- SHARPENED V-SIGN FLICK ---
             if is_v and self.active_mode != "volume":
                 self.active_mode = "slide"
                 
                 # Track the Index Tip (Landmark 8) for maximum "snap"
-                curr_x = landmarks.landmark[8].x
+                curr_x = float(lm[8, 0])
                 self.x_buffer.append(curr_x)
-                
-                if len(self.x_buffer) == 5 and current_time - self.last_action_time > 0.6:
-                    diff_x = self.x_buffer[-1] - self.x_buffer[0]
-                    
-                    # ULTRA-SENSITIVE NEXT
-                    if diff_x > 0.12: 
-                        gesture = "swipe_right"
-                        self.last_action_time = current_time
-                        self.x_buffer.clear()
-                    
-                    # ULTRA-SENSITIVE PREVIOUS (lowered from -0.18 for instant response)
-                    elif diff_x < -0.10:
-                        gesture = "swipe_left"
-                        self.last_action_time = current_time
-                        self.x_buffer.clear()
+                gesture = self.detect_swipe(current_time)
                 
                 # Visual Handle (Cyan for V-Sign)
-                p1 = (int(landmarks.landmark[8].x * w), int(landmarks.landmark[8].y * h))
-                p2 = (int(landmarks.landmark[12].x * w), int(landmarks.landmark[12].y * h))
-                cv2.line(frame, p1, p2, (255, 255, 0), 4)
+                if draw:
+                    cv2.line(frame, index_tip, middle_tip, (255, 255, 0), 4)
             
             # --- 2. POLISHED VOLUME SLIDER (Pinch) ---
             elif is_pinch and self.active_mode != "slide":
                 self.active_mode = "volume"
-                curr_y = landmarks.landmark[8].y
+                curr_y = float(lm[8, 1])
                 if self.volume_anchor_y is None: self.volume_anchor_y = curr_y
                 
-                # Visual Rail
-                hand_x = int(landmarks.landmark[8].x * w)
-                anchor_y = int(self.volume_anchor_y * h)
-                cv2.line(frame, (hand_x, anchor_y - 100), (hand_x, anchor_y + 100), (0, 255, 0), 1)
-                cv2.circle(frame, (hand_x, int(curr_y * h)), 12, (0, 255, 0), -1)
+                # Visual Rail (smoothed so the knob doesn't shake)
+                if draw:
+                    hand_x = index_tip[0]
+                    anchor_y = int(self.volume_anchor_y * h)
+                    cv2.line(frame, (hand_x, anchor_y - 100), (hand_x, anchor_y + 100), (0, 255, 0), 1)
+                    cv2.circle(frame, index_tip, 12, (0, 255, 0), -1)
 
                 self.y_buffer.append(curr_y)
-                if len(self.y_buffer) == 5:
-                    avg_y_diff = self.volume_anchor_y - np.mean(self.y_buffer)
+                if self.y_buffer.full:
+                    avg_y_diff = self.volume_anchor_y - self.y_buffer.mean()
                     if abs(avg_y_diff) > 0.05:
-                        gesture = "pinch_open" if avg_y_diff > 0 else "pinch_close"
+                        gesture = GESTURE_PINCH_OPEN if avg_y_diff > 0 else GESTURE_PINCH_CLOSE
                         gesture_data['volume_delta'] = avg_y_diff * 200
             
             # --- 3. POLISHED FIST (Play/Pause) ---
@@ -109,24 +615,33 @@ class GestureEngine:
                 self.x_buffer.clear()
                 self.y_buffer.clear()
                 
-                tips = [8, 12, 16, 20]; bases = [6, 10, 14, 18]
-                if all(landmarks.landmark[t].y > landmarks.landmark[b].y for t, b in zip(tips, bases)):
+                if pose & POSE_FIST:
                     if self.fist_start_time is None: self.fist_start_time = current_time
                     elapsed = current_time - self.fist_start_time
                     # Glow Effect
-                    radius = int(max(1, 50 * min(elapsed/1.5, 1.0)))
-                    cv2.circle(frame, (int(landmarks.landmark[0].x * w), int(landmarks.landmark[0].y * h)), radius, (0, 255, 255), 2)
+                    if draw:
+                        radius = int(max(1, 50 * min(elapsed/1.5, 1.0)))
+                        cv2.circle(frame, wrist, radius, (0, 255, 255), 2)
                     if elapsed >= 1.5:
-                        gesture = "fist"
+                        gesture = GESTURE_FIST
                         self.fist_start_time = current_time + 2.0
                 else: self.fist_start_time = None
 
-            if config.SHOW_GESTURE_NAME and gesture != "none":
-                cv2.putText(frame, f"COMMAND: {gesture.upper()}", (10, 50), 
-                            cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2)
+            if draw and self._show_gesture_name and gesture is not GESTURE_NONE:
+                cv2.putText(frame, GESTURE_LABELS[gesture], (10, 50), 
+                            FONT, 1, (0, 255, 255), 2)
+        else:
+            self.reset_smoothing()
+
+        if draw and self._show_metrics:
+            self.draw_metrics(frame)
 
         return frame, gesture, gesture_data
 
     def cleanup(self):
-        self.hands.close()
+        if self.landmarker is not None:
+            self.landmarker.close()
+        for hands in (self.hands, self.hands_roi, self.hands_lite):
+            if hands is not None:
+                hands.close()
 
@@ -0,0 +1,88 @@
+"""
+GESTURE KERNELS
+Per-frame landmark math compiled to native code with Numba (falls back to plain Python).
+All kernels take landmarks as a contiguous float32 (21, 3) array of normalized x, y, z.
+"""
+
+import math
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """No-op stand-in so the kernels still run (slower) without Numba"""
+        return lambda fn: fn
+
+# Pose flags returned by classify_pose (bitmask, several can be set at once)
+POSE_FIST = 1
+POSE_PINCH = 2
+POSE_V_SIGN = 4
+
+PINCH_THRESHOLD = 0.06   # Thumb tip <-> index tip (normalized)
+PINCH_THRESHOLD_SQ = PINCH_THRESHOLD * PINCH_THRESHOLD
+V_GAP_THRESHOLD = 0.02   # Index tip <-> middle tip horizontal gap
+
+# Index, middle, ring, pinky: a finger is extended when its tip is above its PIP joint
+FINGER_TIPS = np.array([8, 12, 16, 20], dtype=np.int32)
+FINGER_PIPS = np.array([6, 10, 14, 18], dtype=np.int32)
+
+# Extended-finger mask (bit 0 = index ... bit 3 = pinky) -> pose it can be
+FINGER_POSES = np.zeros(16, dtype=np.int32)
+FINGER_POSES[0b0000] = POSE_FIST
+FINGER_POSES[0b0011] = POSE_V_SIGN  # Still needs the index/middle spread check
+
+
+@njit('Tuple((i4, f4, f4))(f4[:, ::1])', cache=True, fastmath=True)
+def classify_pose(lm):
+    """One pass over the landmarks: returns (pose flags, squared pinch distance, depth proxy)"""
+    extended = 0
+    for i in range(4):
+        if lm[FINGER_TIPS[i], 1] < lm[FINGER_PIPS[i], 1]:
+            extended |= 1 << i
+    flags = FINGER_POSES[extended]
+
+    # V-sign: index and middle extended (ring, pinky curled) and spread apart
+    if flags == POSE_V_SIGN and abs(lm[8, 0] - lm[12, 0]) <= V_GAP_THRESHOLD:
+        flags = 0
+
+    # Pinch: thumb tip close to index tip (squared distances, no sqrt)
+    dx = lm[4, 0] - lm[8, 0]
+    dy = lm[4, 1] - lm[8, 1]
+    pinch_d2 = dx * dx + dy * dy
+    if pinch_d2 < PINCH_THRESHOLD_SQ and flags != POSE_V_SIGN:
+        flags |= POSE_PINCH
+
+    # Wrist -> middle MCP span shrinks as the hand moves away from the camera
+    sx = lm[0, 0] - lm[9, 0]
+    sy = lm[0, 1] - lm[9, 1]
+    depth_proxy = math.sqrt(sx * sx + sy * sy)
+
+    return flags, np.float32(pinch_d2), np.float32(depth_proxy)
+
+
+TWO_PI = 2.0 * math.pi
+
+
+@njit('void(f4[:, ::1], f4[:, ::1], f4[:, ::1], f8, f8, f8, f8)', cache=True, fastmath=True)
+def one_euro_update(x, x_prev, dx_prev, dt, min_cutoff, beta, d_cutoff):
+    """One Euro filter step for every element, updating x_prev and dx_prev in place"""
+    # Low-pass smoothing factor for cutoff fc: 1 / (1 + 1 / (2*pi*fc*dt))
+    twopi_dt = TWO_PI * dt
+    a_d = 1.0 / (1.0 + 1.0 / (twopi_dt * d_cutoff))
+    for i in range(x.shape[0]):
+        for j in range(x.shape[1]):
+            edx = dx_prev[i, j] + a_d * ((x[i, j] - x_prev[i, j]) / dt - dx_prev[i, j])
+            dx_prev[i, j] = edx
+            cutoff = min_cutoff + beta * abs(edx)
+            x_prev[i, j] += (x[i, j] - x_prev[i, j]) / (1.0 + 1.0 / (twopi_dt * cutoff))
+
+
+def warmup():
+    """Trigger JIT compilation (or load the cached build) before the first frame"""
+    lm = np.zeros((21, 3), dtype=np.float32)
+    classify_pose(lm)
+    one_euro_update(lm, lm.copy(), lm.copy(), 1.0, 1.0, 0.0, 1.0)
@@ -1,27 +1,158 @@
 """
-MAIN APPLICATION (TWO-HANDED EDITION)
-Integrates two-handed gesture detection with media control actions.
+MAIN APPLICATION
+Integrates hand gesture detection with media control actions.
 """
 
+import argparse
 import cv2
+import logging
+import numpy as np
+import platform
+import queue
+import signal
+import threading
 import time
+from collections import deque
 import config
-from gesture_engine import GestureEngine
+from gesture_engine import (GestureEngine, GESTURE_NONE, GESTURE_FIST, GESTURE_SWIPE_RIGHT,
+                            GESTURE_SWIPE_LEFT, GESTURE_PINCH_OPEN, GESTURE_PINCH_CLOSE)
 from media_controller import create_controller
 
+WINDOW_NAME = 'Holographic Control'
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+# Status output goes through logging: DEBUG messages are dropped before formatting unless
+# DEBUG_MODE is on, and nothing on the frame path writes to stdout every frame
+log = logging.getLogger('gesture')
+
+# Pinch volume: requested steps are accumulated and sent as one larger step per flush window
+VOLUME_GESTURES = {GESTURE_PINCH_OPEN: 1, GESTURE_PINCH_CLOSE: -1}
+VOLUME_STEP = 5          # % per step (first frame of a pinch, and per 0.1 s while held)
+VOLUME_RATE = 50.0       # %/s while the pinch is held away from its anchor
+VOLUME_FLUSH_S = 0.15    # Minimum time between OS volume calls
+
+# Minimum seconds between two triggers of the same discrete gesture. Pinch volume is
+# rate-limited separately by the VOLUME_FLUSH_S accumulator.
+COOLDOWN_BY_GESTURE = {
+    GESTURE_FIST: config.GESTURE_COOLDOWN,
+    GESTURE_SWIPE_RIGHT: config.GESTURE_COOLDOWN,
+    GESTURE_SWIPE_LEFT: config.GESTURE_COOLDOWN,
+}
+
+MAX_STALE_GRABS = 2  # Backlogged frames the reader may skip (undecoded) before reading one
+
+# Native capture backends: skip OpenCV's backend probing and the slower MSMF/GStreamer paths
+CAPTURE_BACKENDS = {
+    "Windows": cv2.CAP_DSHOW,
+    "Linux": cv2.CAP_V4L2,
+}
+
+
+def open_camera(index):
+    backend = CAPTURE_BACKENDS.get(platform.system())
+    if backend is not None:
+        cap = cv2.VideoCapture(index, backend)
+        if cap.isOpened():
+            return cap
+        cap.release()
+    return cv2.VideoCapture(index)
+
+
+class FrameReader(threading.Thread):
+    """Reads camera frames on a background thread, keeping only the newest one.
+
+    Frames are read into recycled buffers: the consumer hands each frame back with
+    release() once it's done with it, so steady-state capture allocates nothing.
+    If the thread falls behind the camera, frames that already sit in the driver's
+    queue are grabbed and dropped without being decoded.
+    """
+
+    def __init__(self, cap):
+        super().__init__(daemon=True)
+        self.cap = cap
+        self.frames = queue.Queue(maxsize=1)
+        self.running = True
+        self._free = queue.SimpleQueue()
+        # A grab returning faster than half a frame period didn't wait for the sensor:
+        # the frame was already queued, i.e. stale
+        self._live_grab_s = 0.5 / config.CAMERA_FPS
+
+    def run(self):
+        while self.running:
+            if not self._grab_latest():
+                break
+            try:
+                buf = self._free.get_nowait()
+                ret, frame = self.cap.retrieve(buf)
+            except queue.Empty:
+                ret, frame = self.cap.retrieve()
+            if not ret:
+                break
+            self._publish((frame, time.monotonic()))
+        self._publish(None)  # Sentinel: camera closed
+
+    def _grab_latest(self):
+        for _ in range(MAX_STALE_GRABS + 1):
+            t0 = time.monotonic()
+            if not self.cap.grab():
+                return False
+            if time.monotonic() - t0 >= self._live_grab_s:
+                break
+        return True
+
+    def _publish(self, item):
+        # Replace a frame the consumer hasn't picked up yet instead of queueing behind it
+        try:
+            stale = self.frames.get_nowait()
+            if stale is not None:
+                self.release(stale[0])
+        except queue.Empty:
+            pass
+        self.frames.put_nowait(item)
+
+    def release(self, frame):
+        self._free.put(frame)
+
+    def stop(self):
+        self.running = False
+        self.join(timeout=1.0)
+
+
 class GestureMediaController:
     def __init__(self):
         print("=" * 60)
-        print("🎮 HOLOGRAPHIC GESTURE CONTROL - TWO-HANDED MODE")
+        print("🎮 HOLOGRAPHIC GESTURE CONTROL")
         print("=" * 60)
         
         # Initialize components
         self.gesture_engine = GestureEngine()
         self.media_controller = create_controller()
         
+        # Gesture -> (controller action returning True on success, feedback label)
+        self._dispatch = {
+            GESTURE_FIST: (self.media_controller.play_pause, "▶️⏸️ PLAY/PAUSE"),
+            GESTURE_SWIPE_RIGHT: (self.media_controller.next_track, "⏭️ NEXT TRACK (Right Hand)"),
+            GESTURE_SWIPE_LEFT: (self.media_controller.prev_track, "⏮️ PREVIOUS TRACK (Left Hand)"),
+        }
+        self._last_time_by_gesture = dict.fromkeys(COOLDOWN_BY_GESTURE, float("-inf"))
+
+        # Pinch volume accumulator (see VOLUME_* constants)
+        self._pending_vol_delta = 0.0
+        self._last_vol_time = None
+        self._last_vol_flush = 0.0
+        self._cooldown_logged = False  # Log a controller cooldown once, not on every blocked flush
+        
         # UI State
         self.current_action = None
         self.action_time = 0
+
+        self._panel_cache = {}  # action name -> pre-rendered feedback box
+
+        # Session statistics (bounded: only recent actions are ever shown)
+        self.action_history = deque(maxlen=64)
+        self.action_count = 0
+        self.frame_count = 0
+        self.start_time = time.monotonic()
         
         print("\n✅ System Ready!")
         print("🤏 Pinch then move hand UP/DOWN to adjust volume.")
@@ -29,70 +160,228 @@ class GestureMediaController:
         print("✌️ Left Peace sign Wave  = PREVIOUS")
         print("✊ Fist (1.5s)     = PLAY/PAUSE")
 
-    def run(self):
-        cap = cv2.VideoCapture(config.CAMERA_INDEX)
+    def run(self, headless=False):
+        """Capture and act until 'q' (or Ctrl+C when headless, i.e. with no preview window)"""
+        cap = open_camera(config.CAMERA_INDEX)
+        # MJPG keeps USB bandwidth low; a 1-frame driver buffer avoids reacting to stale frames
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
         cap.set(cv2.CAP_PROP_FRAME_WIDTH, config.CAMERA_WIDTH)
         cap.set(cv2.CAP_PROP_FRAME_HEIGHT, config.CAMERA_HEIGHT)
+        cap.set(cv2.CAP_PROP_FPS, config.CAMERA_FPS)  # Some backends reset FPS on format change
+        if log.isEnabledFor(logging.DEBUG):
+            fourcc = int(cap.get(cv2.CAP_PROP_FOURCC))
+            fmt = "".join(chr((fourcc >> (8 * i)) & 0xFF) for i in range(4))
+            log.debug("📷 Camera: %s @ %.0f FPS", fmt, cap.get(cv2.CAP_PROP_FPS))
+
+        # Three stages: FrameReader thread -> inference thread -> this (main) thread for
+        # actions + display. imshow/waitKey stay on the main thread, as macOS requires.
+        cv2.setNumThreads(1)
+        reader = FrameReader(cap)
+        show_q = queue.Queue(maxsize=2)
+        self.running = True
+        self.display_visible = not headless  # Whether the worker draws overlays at all
+        window_shown = False
+        previous_sigint = None
+        if headless:
+            # No window means no waitKey; Ctrl+C ends the loop below (a second one forces exit)
+            previous_sigint = signal.signal(
+                signal.SIGINT, lambda *_: self._request_stop(reader, show_q))
+        else:
+            cv2.namedWindow(WINDOW_NAME)
+        worker = threading.Thread(target=self._inference_loop, args=(reader, show_q), daemon=True)
+        reader.start()
+        worker.start()
         
         try:
-            while cap.isOpened():
-                ret, frame = cap.read()
-                if not ret:
+            while True:
+                item = show_q.get()
+                if item is None:
                     break
+
+                # If a slow imshow let results pile up, act on every one of them
+                # (no gesture is lost) but only display the newest frame
+                frame = None
+                while item is not None:
+                    drawn, gesture, data, current_time = item
+                    self.frame_count += 1
+                    self.execute_action(gesture, data, current_time)
+                    if drawn is not None:
+                        frame = drawn
+                    try:
+                        item = show_q.get_nowait()
+                    except queue.Empty:
+                        break
+                if item is None:
+                    break
+                self.flush_volume(current_time)
+                if headless:
+                    continue
+
+                # WND_PROP_VISIBLE only tells whether the window still exists (Win32/GTK
+                # don't report minimization): below 1 after it was shown means it was closed
+                if window_shown and cv2.getWindowProperty(WINDOW_NAME, cv2.WND_PROP_VISIBLE) < 1:
+                    break
+                if frame is not None:
+                    self.draw_action_feedback(frame, current_time)
+                    cv2.imshow(WINDOW_NAME, frame)
+                    window_shown = True
                 
-                # Mirror for natural interaction
-                frame = cv2.flip(frame, 1)
-                current_time = time.time()
-                
-                # Process frame (Now supports 2 hands)
-                frame, gesture, data = self.gesture_engine.process_frame(frame)
-                
-                # Execute Actions based on the new logic
-                if gesture != "none":
-                    if gesture == "fist":
-                        if self.media_controller.play_pause():
-                            self.current_action = "▶️⏸️ PLAY/PAUSE"
-                            self.action_time = current_time
-                            
-                    elif gesture == "swipe_right":
-                        if self.media_controller.next_track():
-                            self.current_action = "⏭️ NEXT TRACK (Right Hand)"
-                            self.action_time = current_time
-                            
-                    elif gesture == "swipe_left":
-                        if self.media_controller.prev_track():
-                            self.current_action = "⏮️ PREVIOUS TRACK (Left Hand)"
-                            self.action_time = current_time
-                            
-                    elif gesture == "pinch_open":
-                        self.media_controller.volume_up()
-                        self.current_action = "🔊 VOLUME UP"
-                        self.action_time = current_time
-                        
-                    elif gesture == "pinch_close":
-                        self.media_controller.volume_down()
-                        self.current_action = "🔉 VOLUME DOWN"
-                        self.action_time = current_time
-
-                # Draw UI Feedback
-                if self.current_action and (current_time - self.action_time < 2.0):
-                    # Draw a nice background box for the action text
-                    cv2.rectangle(frame, (10, 10), (450, 60), (0, 0, 0), -1)
-                    cv2.putText(frame, self.current_action, (20, 45),
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2)
-                
-                cv2.imshow('Holographic Control', frame)
-                
-                if cv2.waitKey(1) & 0xFF == ord('q'):
+                # pollKey pumps the GUI event loop without waitKey's minimum 1 ms sleep;
+                # show_q.get() already paces this loop
+                key = cv2.pollKey() & 0xFF
+                if key == ord('q'):
                     break
+                elif key == ord('s'):
+                    self.show_statistics()
                     
-        except Exception as e:
-            print(f"❌ Error: {e}")
+        except Exception:
+            log.exception("❌ Error")
         finally:
+            if previous_sigint is not None:
+                signal.signal(signal.SIGINT, previous_sigint)
+            self.running = False
+            reader.stop()
+            worker.join(timeout=1.0)
             cap.release()
-            cv2.destroyAllWindows()
+            if not headless:
+                cv2.destroyAllWindows()
             self.gesture_engine.cleanup()
+            self.media_controller.cleanup()
+
+    def _request_stop(self, reader, show_q):
+        """SIGINT handler: stop gracefully; a second Ctrl+C raises KeyboardInterrupt"""
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        self.running = False
+        reader.running = False
+        # Wake the main loop's show_q.get() without waiting for another camera frame.
+        # Put from a thread: the handler may have interrupted this one inside the queue's lock
+        threading.Thread(target=show_q.put, args=(None,), daemon=True).start()
+
+    def _inference_loop(self, reader, show_q):
+        # Output frames rotate through enough buffers that none is redrawn while
+        # it is still queued (maxsize) or being shown (1) or drawn into (1)
+        out_bufs = [None] * (show_q.maxsize + 2)
+        i = 0
+        try:
+            while self.running:
+                item = reader.frames.get()
+                if item is None:
+                    break
+                frame, current_time = item
+                if out_bufs[i] is None or out_bufs[i].shape != frame.shape:
+                    out_bufs[i] = np.empty_like(frame)
+
+                # Process frame (returns the mirrored frame with overlays)
+                captured = frame
+                drawn = self.display_visible
+                frame, gesture, data = self.gesture_engine.process_frame(
+                    captured, out=out_bufs[i], current_time=current_time, draw=drawn)
+                reader.release(captured)
+                i = (i + 1) % len(out_bufs)
+
+                show_q.put((frame if drawn else None, gesture, data, current_time))
+        except Exception:
+            log.exception("❌ Error")
+        finally:
+            try:
+                show_q.put(None, timeout=1.0)  # Sentinel: no more frames
+            except queue.Full:
+                pass
+
+    def execute_action(self, gesture, data, current_time):
+        if gesture is GESTURE_NONE:  # Most frames: skip the table lookups entirely
+            return
+        direction = VOLUME_GESTURES.get(gesture)
+        if direction is not None:
+            self.queue_volume(direction, current_time)
+            return
+
+        action = self._dispatch.get(gesture)
+        if action is None or current_time - self._last_time_by_gesture[gesture] < COOLDOWN_BY_GESTURE[gesture]:
+            return
+        handler, name = action
+        if handler():
+            self._last_time_by_gesture[gesture] = current_time
+            self.record_action(name, current_time)
+
+    def queue_volume(self, direction, current_time):
+        # A fresh pinch gets one full step right away; a held pinch accrues at VOLUME_RATE
+        if self._last_vol_time is None or current_time - self._last_vol_time > 0.1:
+            self._pending_vol_delta += direction * VOLUME_STEP
+        else:
+            self._pending_vol_delta += direction * VOLUME_RATE * (current_time - self._last_vol_time)
+        self._last_vol_time = current_time
+
+    def flush_volume(self, current_time):
+        # Flushed from the frame loop rather than a timer thread: pycaw's COM interface was
+        # created on this (main) thread and must be called from it
+        if abs(self._pending_vol_delta) < 1 or current_time - self._last_vol_flush < VOLUME_FLUSH_S:
+            return
+        amount = int(abs(self._pending_vol_delta))
+        if self._pending_vol_delta > 0:
+            done = self.media_controller.volume_up(amount)
+            name = "🔊 VOLUME UP"
+        else:
+            done = self.media_controller.volume_down(amount)
+            name = "🔉 VOLUME DOWN"
+        if done:
+            # Keep the fractional remainder for the next window
+            self._pending_vol_delta -= amount if self._pending_vol_delta > 0 else -amount
+            self._last_vol_flush = current_time
+            self._cooldown_logged = False
+            self.record_action(name, current_time)
+        elif not self._cooldown_logged:
+            log.debug("⏳ Volume cooldown active")
+            self._cooldown_logged = True
+
+    def record_action(self, name, current_time):
+        self.current_action = name
+        self.action_time = current_time
+        self.action_count += 1
+        self.action_history.append((current_time, name))
+
+    def show_statistics(self):
+        elapsed = time.monotonic() - self.start_time
+        fps = self.frame_count / elapsed if elapsed > 0 else 0.0
+        print("\n" + "=" * 60)
+        print(f"📊 Runtime: {elapsed:.0f}s | Frames: {self.frame_count} | Avg FPS: {fps:.1f}")
+        print(f"🎯 Actions executed: {self.action_count}")
+        for t, name in list(self.action_history)[-10:]:
+            print(f"   +{t - self.start_time:7.1f}s  {name}")
+        print("=" * 60)
+
+    def draw_action_feedback(self, frame, current_time):
+        if self.current_action and (current_time - self.action_time < 2.0):
+            # Render each action's box + label once; it's shown every frame for 2 seconds
+            panel = self._panel_cache.get(self.current_action)
+            if panel is None:
+                panel = self._render_action_panel(self.current_action)
+                if len(self._panel_cache) >= 16:
+                    self._panel_cache.clear()
+                self._panel_cache[self.current_action] = panel
+
+            # Opaque box: a plain copy into the frame, clipped to its width
+            ph, pw = panel.shape[:2]
+            pw = min(pw, frame.shape[1] - 10)
+            frame[10:10 + ph, 10:10 + pw] = panel[:, :pw]
+
+    def _render_action_panel(self, text):
+        (text_w, _), _ = cv2.getTextSize(text, FONT, 0.8, 2)
+        # Draw a nice background box for the action text
+        panel = np.zeros((50, text_w + 20, 3), dtype=np.uint8)
+        cv2.putText(panel, text, (10, 35), FONT, 0.8, (0, 255, 255), 2)
+        return panel
 
 if __name__ == "__main__":
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(handler)
+    log.setLevel(logging.DEBUG if config.DEBUG_MODE else logging.INFO)
+    parser = argparse.ArgumentParser(description="Control media playback with hand gestures.")
+    parser.add_argument("--headless", action="store_true",
+                        help="run without the preview window (no drawing, imshow or waitKey)")
+    args = parser.parse_args()
+
     app = GestureMediaController()
-    app.run()
+    app.run(headless=args.headless)
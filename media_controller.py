@@ -1,12 +1,43 @@
+import logging
 import platform
+import subprocess
+import threading
 import time
 import config
 
+log = logging.getLogger('gesture.media')
+
+# Imported up front: the first import stalls 100-200 ms. It can also fail outright
+# (e.g. Linux without DISPLAY, where the X11 backend raises at import).
+try:
+    import pyautogui
+    PYAUTOGUI_ERROR = None
+except Exception as e:
+    pyautogui = None
+    PYAUTOGUI_ERROR = e
+
+DOUBLE_PRESS_GAP_S = 0.1  # Delay before the second track-skip key press
+VOLUME_RESYNC_S = 5.0  # Re-read the OS volume at most this often (it may change outside the app)
+KEY_VOLUME_STEP = 5  # Approximate % moved by one volume media key (GNOME/KDE 5%, macOS 6.25%)
+
+# amixer stdin commands (newline-terminated), formatted with the step in percent
+AMIXER_VOLUME_UP = "sset Master {}%+\n"
+AMIXER_VOLUME_DOWN = "sset Master {}%-\n"
+
 class SystemMediaController:
     def __init__(self):
         self.os_type = platform.system()
         self.use_pycaw = False
+        self.amixer = None
         self.last_call = 0
+        self.current_volume = None  # 0-100, cached so a step is one write, not a read + write
+        self.volume_synced_at = 0
+        self._last_double_press = {}  # key -> monotonic time of its last double press
+        if pyautogui is not None:
+            self._press = pyautogui.press
+        else:
+            log.warning("⚠️ pyautogui unavailable, media keys disabled: %s", PYAUTOGUI_ERROR)
+            self._press = self._press_unavailable
         
         if self.os_type == "Windows":
             try:
@@ -20,63 +51,134 @@ class SystemMediaController:
                 self.interface = devices.Activate(IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
                 self.volume_control = self.interface.QueryInterface(IAudioEndpointVolume)
                 self.use_pycaw = True
-                print("✅ Windows Audio Engine Restored")
+                self._sync_volume(time.monotonic())
+                log.info("✅ Windows Audio Engine Restored")
             except Exception as e:
-                print(f"⚠️ Audio Init Error: {e}")
+                log.warning("⚠️ Audio Init Error: %s", e)
 
-    def volume_up(self, amount=5):
-        if time.time() - self.last_call < 0.1: return
-        self.last_call = time.time()
+        elif self.os_type == "Linux":
+            # One long-lived amixer reading commands from stdin, instead of a process per volume step
+            try:
+                self.amixer = subprocess.Popen(['amixer', '-q', '-s'], stdin=subprocess.PIPE,
+                                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, text=True)
+                log.info("✅ ALSA mixer connected")
+            except OSError as e:
+                log.warning("⚠️ amixer unavailable, using media keys for volume: %s", e)
+
+        # Volume backend picked once: a volume step is then a single call, no per-step checks
         if self.use_pycaw:
-            curr = self.volume_control.GetMasterVolumeLevelScalar()
-            self.volume_control.SetMasterVolumeLevelScalar(min(1.0, curr + 0.05), None)
+            self._volume_step = self._step_volume
+        elif self.amixer:
+            self._volume_step = self._volume_amixer
         else:
-            import pyautogui
-            pyautogui.press('volumeup')
+            self._volume_step = self._volume_keys
+
+    def _press_unavailable(self, key, presses=1):
+        log.debug("⌨️ Media key '%s' skipped (pyautogui unavailable)", key)
+
+    def _amixer_send(self, command):
+        try:
+            self.amixer.stdin.write(command)
+            self.amixer.stdin.flush()
+            return True
+        except (OSError, ValueError):
+            # amixer exited; fall back to media keys from now on
+            self.amixer = None
+            return False
+
+    def _sync_volume(self, now):
+        self.current_volume = self.volume_control.GetMasterVolumeLevelScalar() * 100
+        self.volume_synced_at = now
+
+    def _step_volume(self, delta, now):
+        if now - self.volume_synced_at > VOLUME_RESYNC_S:
+            self._sync_volume(now)
+        volume = min(100.0, max(0.0, self.current_volume + delta))
+        if volume == self.current_volume:
+            return  # Pinned at 0 or 100: nothing to send
+        self.current_volume = volume
+        self.volume_control.SetMasterVolumeLevelScalar(volume / 100.0, None)
+
+    def _volume_amixer(self, delta, now):
+        command = AMIXER_VOLUME_UP if delta > 0 else AMIXER_VOLUME_DOWN
+        if not self._amixer_send(command.format(abs(delta))):
+            self._volume_step = self._volume_keys
+            self._volume_keys(delta, now)
+
+    def _volume_keys(self, delta, now):
+        # Media keys have a fixed step, so a coalesced delta becomes that many presses
+        presses = max(1, round(abs(delta) / KEY_VOLUME_STEP))
+        self._press('volumeup' if delta > 0 else 'volumedown', presses=presses)
+
+    def volume_up(self, amount=5):
+        now = time.monotonic()
+        if now - self.last_call < 0.1: return False
+        self.last_call = now
+        self._volume_step(amount, now)
+        return True
 
     def volume_down(self, amount=5):
-        if time.time() - self.last_call < 0.1: return
-        self.last_call = time.time()
-        if self.use_pycaw:
-            curr = self.volume_control.GetMasterVolumeLevelScalar()
-            self.volume_control.SetMasterVolumeLevelScalar(max(0.0, curr - 0.05), None)
-        else:
-            import pyautogui
-            pyautogui.press('volumedown')
+        now = time.monotonic()
+        if now - self.last_call < 0.1: return False
+        self.last_call = now
+        self._volume_step(-amount, now)
+        return True
 
     def play_pause(self):
-        import pyautogui
-        pyautogui.press('playpause')
+        self._press('playpause')
         return True
 
+    def _double_press(self, key):
+        """Press `key` now and again DOUBLE_PRESS_GAP_S later on a timer, without blocking"""
+        now = time.monotonic()
+        if now - self._last_double_press.get(key, 0) < DOUBLE_PRESS_GAP_S:
+            return False  # Previous double press still in flight
+        self._last_double_press[key] = now
+        self._press(key)
+        timer = threading.Timer(DOUBLE_PRESS_GAP_S, self._repeat_press, args=(key,))
+        timer.daemon = True
+        timer.start()
+        return True
+
+    def _repeat_press(self, key):
+        try:
+            self._press(key)
+        except Exception as e:
+            log.error("❌ Repeat %s Error: %s", key, e)
+
     def next_track(self):
         try:
-            import pyautogui
             # Double press for instant skip response
-            pyautogui.press('nexttrack')
-            time.sleep(0.1)  # Tiny delay
-            pyautogui.press('nexttrack')
-            print("⏭️⏭️ Executed: Double Next (Skip Track)")
+            if not self._double_press('nexttrack'):
+                return False
+            log.debug("⏭️⏭️ Executed: Double Next (Skip Track)")
             return True
         except Exception as e:
-            print(f"❌ Next Error: {e}")
+            log.error("❌ Next Error: %s", e)
             return False
 
     def prev_track(self):
         try:
-            import pyautogui
             # Send TWO presses to ensure it skips the song, not just restarts it
-            pyautogui.press('prevtrack')
-            time.sleep(0.1)  # Tiny delay
-            pyautogui.press('prevtrack')
-            print("⏮️⏮️ Executed: Double Previous (Skip Track)")
+            if not self._double_press('prevtrack'):
+                return False
+            log.debug("⏮️⏮️ Executed: Double Previous (Skip Track)")
             return True
         except Exception as e:
-            print(f"❌ Previous Error: {e}")
+            log.error("❌ Previous Error: %s", e)
             return False
 
     def get_status(self):
         return {'controller': 'system'}
 
+    def cleanup(self):
+        if self.amixer:
+            try:
+                self.amixer.stdin.close()
+                self.amixer.wait(timeout=1.0)
+            except (OSError, subprocess.TimeoutExpired):
+                self.amixer.kill()
+            self.amixer = None
+
 def create_controller():
     return SystemMediaController()